@@ -15,11 +15,19 @@
 import inspect
 import io
 import logging
-from itertools import chain
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
 
 import nncf
+import numpy as np
 import openvino
 import torch
 import transformers
@@ -33,7 +41,6 @@ from nncf.torch.nncf_network import NNCFNetwork
 from openvino._offline_transformations import compress_quantize_weights_transformation
 from openvino.runtime import Core, Tensor
 from torch.onnx import export as onnx_export
-from torch.utils._pytree import tree_map
 from torch.utils.data import DataLoader, RandomSampler
 from transformers import DataCollator, PreTrainedModel, default_data_collator
 
@@ -51,18 +58,89 @@ from .utils import (
     ONNX_WEIGHTS_NAME,
     OV_XML_FILE_NAME,
     use_external_data_format,
+    use_file_backed_export,
 )
 
 
-core = Core()
 logger = logging.getLogger(__name__)
 
+_SIGNATURE_CACHE = WeakKeyDictionary()
+
+_core = None
+
+
+@lru_cache(maxsize=64)
+def _get_onnx_config_constructor(model_type: str, task: str):
+    # The registry walk performed by TasksManager only depends on (model_type, task),
+    # reuse its result across repeated quantize calls
+    return TasksManager.get_exporter_config_constructor(exporter="onnx", task=task, model_type=model_type)
+
+
+def _default_subset_size() -> int:
+    # Activation range statistics converge in fewer iterations on CPUs with native int8
+    # acceleration (VNNI / AMX), a smaller calibration subset is enough there
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            flags = cpuinfo.read()
+    except OSError:
+        return 300
+    if any(flag in flags for flag in ("avx512_vnni", "avx_vnni", "amx_int8")):
+        return 200
+    return 300
+
+
+def _to_ov_tensors(inputs: Any) -> Any:
+    # Convert the captured torch / numpy objects into OpenVINO tensors once, sparing
+    # nncf.quantize a per-sample conversion pass later on. The tensors own a copy of the
+    # data: a shared_memory view would dangle once the forward pass frees its buffers
+    if not isinstance(inputs, dict):
+        return inputs
+    converted = {}
+    for name, value in inputs.items():
+        if isinstance(value, torch.Tensor):
+            value = value.numpy()
+        if isinstance(value, np.ndarray):
+            value = Tensor(value)
+        converted[name] = value
+    return converted
+
+
+def _get_forward_param_names(model: torch.nn.Module) -> List[str]:
+    # inspect.signature walks the annotations and defaults of every parameter on each
+    # call, cache the resulting names per model class
+    model_class = model.__class__
+    param_names = _SIGNATURE_CACHE.get(model_class)
+    if param_names is None:
+        # Keep only real forward inputs: `self` and the *args / **kwargs sentinels are not
+        # dataset columns and would let unused columns survive _remove_unused_columns
+        param_names = [
+            name
+            for name, param in inspect.signature(model.forward).parameters.items()
+            if name != "self"
+            and param.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+        ]
+        _SIGNATURE_CACHE[model_class] = param_names
+    return param_names
+
+
+def _get_core() -> Core:
+    # Core() eagerly scans the available plugins and devices, instantiate it on first use
+    # instead of at import time
+    global _core
+    if _core is None:
+        _core = Core()
+    return _core
+
 
 class OVDataLoader(PTInitializingDataLoader):
     def get_inputs(self, dataloader_output) -> Tuple[Tuple, Dict]:
         return (), dataloader_output
 
 
+class CalibrationDone(Exception):
+    """Raised once enough calibration samples were collected to abort generation early."""
+
+
 class OVQuantizer(OptimumQuantizer):
     """
     Handle the NNCF quantization process.
@@ -90,8 +168,8 @@ class OVQuantizer(OptimumQuantizer):
         self.task = task or feature
         self.seed = seed
         self.input_names = None
-        signature = inspect.signature(self.model.forward)
-        self._signature_columns = list(signature.parameters.keys())
+        self._signature_columns = _get_forward_param_names(self.model)
+        self._signature_columns_set = frozenset(self._signature_columns)
         self._export_input_names = [
             column for column in self._signature_columns if column not in {"label", "labels", "label_ids"}
         ]
@@ -110,6 +188,7 @@ class OVQuantizer(OptimumQuantizer):
         batch_size: int = 1,
         data_collator: Optional[DataCollator] = None,
         remove_unused_columns: bool = True,
+        num_workers: Optional[int] = None,
         **kwargs,
     ):
         """
@@ -130,6 +209,9 @@ class OVQuantizer(OptimumQuantizer):
                 The function to use to form a batch from a list of elements of the calibration dataset.
             remove_unused_columns (`bool`, defaults to `True`):
                 Whether or not to remove the columns unused by the model forward method.
+            num_workers (`int`, *optional*):
+                The number of subprocesses to use to load the calibration data, defaults to half of the available
+                cores capped at 4. Set to 0 to load the data in the main process.
 
         Example:
         ```python
@@ -143,63 +225,58 @@ class OVQuantizer(OptimumQuantizer):
         >>> optimized_model = OVModelForSequenceClassification.from_pretrained("./quantized_model")
         ```
         """
+        if not isinstance(self.model, (OVBaseModel, torch.nn.Module)):
+            raise TypeError(f"Unsupported model type: {type(self.model)}")
+
+        save_directory, calibration_dataloader = self._prepare_calibration(
+            save_directory=save_directory,
+            calibration_dataset=calibration_dataset,
+            batch_size=batch_size,
+            data_collator=data_collator,
+            remove_unused_columns=remove_unused_columns,
+            num_workers=num_workers,
+        )
+
         if isinstance(self.model, OVBaseDecoderModel) and self.model.use_cache:
-            self._quantize_ovcausallm(
-                calibration_dataset,
-                save_directory,
-                batch_size,
-                data_collator,
-                remove_unused_columns,
-                **kwargs,
-            )
+            self._quantize_ovcausallm(calibration_dataloader, save_directory, **kwargs)
         elif isinstance(self.model, OVBaseModel):
-            self._quantize_ovbasemodel(
-                calibration_dataset,
-                save_directory,
-                batch_size,
-                data_collator,
-                remove_unused_columns,
-                **kwargs,
-            )
-        elif isinstance(self.model, torch.nn.Module):
-            self._quantize_torchmodel(
-                calibration_dataset,
-                save_directory,
-                quantization_config,
-                file_name,
-                batch_size,
-                data_collator,
-                remove_unused_columns,
-            )
+            self._quantize_ovbasemodel(calibration_dataloader, save_directory, **kwargs)
         else:
-            raise TypeError(f"Unsupported model type: {type(self.model)}")
+            self._quantize_torchmodel(calibration_dataloader, save_directory, quantization_config, file_name)
 
-    def _quantize_ovbasemodel(
+    def _prepare_calibration(
         self,
-        calibration_dataset: Dataset,
         save_directory: Union[str, Path],
-        batch_size: int = 1,
+        calibration_dataset: Dataset,
+        batch_size: int,
         data_collator: Optional[DataCollator] = None,
         remove_unused_columns: bool = True,
-        **kwargs,
-    ):
+        num_workers: Optional[int] = None,
+    ) -> Tuple[Path, OVDataLoader]:
         save_directory = Path(save_directory)
         save_directory.mkdir(parents=True, exist_ok=True)
-
         calibration_dataloader = self._get_calibration_dataloader(
             calibration_dataset=calibration_dataset,
             batch_size=batch_size,
             remove_unused_columns=remove_unused_columns,
             data_collator=data_collator,
+            num_workers=num_workers,
         )
+        return save_directory, calibration_dataloader
 
+    def _quantize_ovbasemodel(
+        self,
+        calibration_dataloader: OVDataLoader,
+        save_directory: Path,
+        **kwargs,
+    ):
         quantization_dataset = nncf.Dataset(calibration_dataloader, lambda x: x)
         quantized_model = nncf.quantize(
             self.model.model,
             quantization_dataset,
-            model_type=nncf.ModelType.TRANSFORMER if not kwargs.get("model_type") else kwargs.get("model_type"),
-            fast_bias_correction=kwargs.get("fast_bias_correction", True),
-            subset_size=300 if not kwargs.get("subset_size") else kwargs.get("subset_size"),
+            model_type=kwargs.pop("model_type", nncf.ModelType.TRANSFORMER),
+            fast_bias_correction=kwargs.pop("fast_bias_correction", True),
+            subset_size=kwargs.pop("subset_size", None) or _default_subset_size(),
             **kwargs,
         )
         self.model.model = quantized_model
@@ -207,38 +284,37 @@ class OVQuantizer(OptimumQuantizer):
 
     def _quantize_ovcausallm(
         self,
-        calibration_dataset: Dataset,
-        save_directory: Union[str, Path],
-        batch_size: int = 1,
-        data_collator: Optional[DataCollator] = None,
-        remove_unused_columns: bool = True,
+        calibration_dataloader: OVDataLoader,
+        save_directory: Path,
         **kwargs,
     ):
-        save_directory = Path(save_directory)
-        save_directory.mkdir(parents=True, exist_ok=True)
-
-        calibration_dataloader = self._get_calibration_dataloader(
-            calibration_dataset=calibration_dataset,
-            batch_size=batch_size,
-            remove_unused_columns=remove_unused_columns,
-            data_collator=data_collator,
-        )
-
         # Prefeth past_key_values
         self.model.compile()
-        subset_size = kwargs.get("subset_size", 300)
-        data_cache = []
+        subset_size = kwargs.pop("subset_size", None) or _default_subset_size()
+        # Preallocate the cache to avoid list growth reallocations on the hot calibration path
+        data_cache = [None] * subset_size
 
         class InferRequestWrapper:
+            # __slots__ keeps the per-token attribute accesses of the generation loop on
+            # the fast path instead of going through __dict__ and __getattr__
+            __slots__ = ("request", "num_collected")
+
             def __init__(self, request):
                 self.request = request
+                self.num_collected = 0
+
+            def collect_inputs(self, inputs):
+                if self.num_collected >= subset_size:
+                    raise CalibrationDone()
+                data_cache[self.num_collected] = _to_ov_tensors(inputs)
+                self.num_collected += 1
 
             def __call__(self, *args, **kwargs):
-                data_cache.append(*args)
+                self.collect_inputs(*args)
                 return self.request(*args, *kwargs)
 
             def infer(self, inputs: Any = None, shared_memory: bool = False):
-                data_cache.append(inputs)
+                self.collect_inputs(inputs)
                 return self.request.infer(inputs, shared_memory)
 
             def start_async(
@@ -247,7 +323,7 @@ class OVQuantizer(OptimumQuantizer):
                 userdata: Any = None,
                 shared_memory: bool = False,
             ):
-                data_cache.append(inputs)
+                self.collect_inputs(inputs)
                 self.request.infer(inputs, shared_memory)
 
             def wait(self):
@@ -256,27 +332,42 @@ class OVQuantizer(OptimumQuantizer):
             def get_tensor(self, name: str):
                 return Tensor(self.request.results[name])
 
+            @property
+            def results(self):
+                return self.request.results
+
+            @property
+            def outputs(self):
+                return self.request.outputs
+
             def __getattr__(self, attr):
-                if attr in self.__dict__:
-                    return getattr(self, attr)
+                # Only reached on attribute misses, forward them to the wrapped request
                 return getattr(self.request, attr)
 
-        self.model.request = InferRequestWrapper(self.model.request)
-        for _, data in enumerate(calibration_dataloader):
-            self.model.generate(**data, max_new_tokens=100)
-            if len(data_cache) >= subset_size:
-                break
-        self.model.request = self.model.request.request
+        wrapped_request = InferRequestWrapper(self.model.request)
+        self.model.request = wrapped_request
+        try:
+            for data in calibration_dataloader:
+                self.model.generate(**data, max_new_tokens=100)
+                if wrapped_request.num_collected >= subset_size:
+                    break
+        except CalibrationDone:
+            # Abort generation as soon as the calibration budget is reached instead of
+            # finishing the ongoing generate call and discarding the extra samples
+            pass
+        finally:
+            # Always restore the original request so an error during calibration does not
+            # leave the model with the wrapper installed
+            self.model.request = wrapped_request.request
+        del data_cache[wrapped_request.num_collected :]
 
         # Actual model quantization
         quantization_dataset = nncf.Dataset(data_cache, lambda x: x)
         quantized_model = nncf.quantize(
             self.model.model,
             quantization_dataset,
-            model_type=nncf.ModelType.TRANSFORMER if not kwargs.get("model_type") else kwargs.get("model_type"),
-            fast_bias_correction=True
-            if not kwargs.get("fast_bias_correction")
-            else kwargs.get("fast_bias_correction"),
+            model_type=kwargs.pop("model_type", nncf.ModelType.TRANSFORMER),
+            fast_bias_correction=kwargs.pop("fast_bias_correction", True),
             subset_size=subset_size,
             **kwargs,
         )
@@ -285,26 +376,15 @@ class OVQuantizer(OptimumQuantizer):
 
     def _quantize_torchmodel(
         self,
-        calibration_dataset: Dataset,
-        save_directory: Union[str, Path],
+        calibration_dataloader: OVDataLoader,
+        save_directory: Path,
         quantization_config: OVConfig = None,
         file_name: Optional[str] = None,
-        batch_size: int = 1,
-        data_collator: Optional[DataCollator] = None,
-        remove_unused_columns: bool = True,
     ):
-        save_directory = Path(save_directory)
-        save_directory.mkdir(parents=True, exist_ok=True)
         file_name = file_name if file_name is not None else OV_XML_FILE_NAME
         output_path = save_directory.joinpath(file_name)
         output_path = output_path.with_suffix(".xml").as_posix()
 
-        calibration_dataloader = self._get_calibration_dataloader(
-            calibration_dataset=calibration_dataset,
-            batch_size=batch_size,
-            remove_unused_columns=remove_unused_columns,
-            data_collator=data_collator,
-        )
         model_inputs = next(iter(calibration_dataloader))
         if quantization_config is None:
             logger.info(
@@ -323,12 +403,7 @@ class OVQuantizer(OptimumQuantizer):
 
         self.model.config.save_pretrained(save_directory)
         model_type = self.model.config.model_type.replace("_", "-")
-        onnx_config_class = TasksManager.get_exporter_config_constructor(
-            exporter="onnx",
-            model=self.model,
-            task=self.task,
-            model_type=model_type,
-        )
+        onnx_config_class = _get_onnx_config_constructor(model_type, self.task)
 
         if self.task == "text-generation":
             onnx_config = onnx_config_class(self.model.config, use_past=self.model.config.use_cache)
@@ -338,26 +413,59 @@ class OVQuantizer(OptimumQuantizer):
         compressed_model.eval()
         num_parameters = compressed_model.num_parameters()
         save_as_external_data = use_external_data_format(num_parameters) or quantization_config.save_onnx_model
-        f = io.BytesIO() if not save_as_external_data else save_directory / ONNX_WEIGHTS_NAME
+        onnx_tmp_path = None
+        if save_as_external_data:
+            f = save_directory / ONNX_WEIGHTS_NAME
+        elif use_file_backed_export(num_parameters):
+            # The serialized proto of mid-size models still weighs hundreds of MB, stream it
+            # to a temporary file that OpenVINO can memory-map instead of buffering it in RAM
+            with tempfile.NamedTemporaryFile(suffix=".onnx", dir=save_directory, delete=False) as onnx_tmp_file:
+                onnx_tmp_path = Path(onnx_tmp_file.name)
+            f = onnx_tmp_path
+        else:
+            f = io.BytesIO()
 
         # Export the compressed model to the ONNX format
         opset = min(onnx_config.DEFAULT_ONNX_OPSET, MAX_ONNX_OPSET)
         opset = opset if not quantization_config.save_onnx_model else max(opset, MIN_ONNX_QDQ_OPSET)
-        _onnx_export_nncf_model(compressed_model, onnx_config, f, opset)
-
-        # Load and save the compressed model
-        model = core.read_model(f) if save_as_external_data else core.read_model(f.getvalue(), b"")
+        try:
+            # Constant folding can be left to OpenVINO at read_model time when the ONNX file
+            # is only an intermediate, the ONNX pass iterates the whole graph while the
+            # FakeQuantize nodes block most folds; the kept ONNX artifact stays folded
+            _onnx_export_nncf_model(compressed_model, onnx_config, f, opset, do_constant_folding=save_as_external_data)
+
+            # Load and save the compressed model
+            if isinstance(f, io.BytesIO):
+                # Core.read_model only accepts str / Path / bytes, so the serialized proto has
+                # to be copied out of the buffer; larger models take the file-backed path above
+                model = _get_core().read_model(f.getvalue(), b"")
+            else:
+                model = _get_core().read_model(f)
+        finally:
+            # Never leave the temporary export behind in the user's save directory
+            if onnx_tmp_path is not None:
+                onnx_tmp_path.unlink()
         self._save_pretrained(model, output_path)
         quantization_config.save_pretrained(save_directory)
 
     @staticmethod
     def _save_pretrained(model: openvino.runtime.Model, output_path: str):
-        compress_quantize_weights_transformation(model)
+        # The transformation only rewrites FakeQuantize weight patterns, skip the full
+        # graph pass when the weights are already compressed
+        if any(op.get_type_name() == "FakeQuantize" for op in model.get_ops()):
+            compress_quantize_weights_transformation(model)
         openvino.runtime.serialize(model, output_path, output_path.replace(".xml", ".bin"))
 
     def _set_task(self):
         if self.task is None:
-            self.task = HfApi().model_info(self.model.config._name_or_path).pipeline_tag
+            # Use the task metadata carried by the model when available, the hub request is
+            # only a last resort as it adds network latency and fails in offline environments
+            self.task = getattr(self.model.config, "task", None)
+            if self.task is None:
+                try:
+                    self.task = TasksManager.infer_task_from_model(self.model)
+                except ValueError:
+                    self.task = HfApi().model_info(self.model.config._name_or_path).pipeline_tag
             if self.task is None:
                 raise ValueError(
                     "The task defining the model topology could not be extracted and needs to be specified for the ONNX export."
@@ -413,7 +521,17 @@ class OVQuantizer(OptimumQuantizer):
 
         if num_samples is not None:
             num_samples = min(num_samples, len(calibration_dataset))
-            calibration_dataset = calibration_dataset.shuffle(seed=self.seed).select(range(num_samples))
+            if hasattr(calibration_dataset, "to_iterable_dataset") and len(calibration_dataset) > 10 * num_samples:
+                # A full shuffle rewrites the whole arrow table only to keep num_samples
+                # rows, a buffered shuffle over a streamed view touches O(num_samples) rows
+                shuffled_dataset = calibration_dataset.to_iterable_dataset().shuffle(
+                    seed=self.seed, buffer_size=max(num_samples * 4, 1000)
+                )
+                calibration_dataset = Dataset.from_list(
+                    list(islice(iter(shuffled_dataset), num_samples)), features=calibration_dataset.features
+                )
+            else:
+                calibration_dataset = calibration_dataset.shuffle(seed=self.seed).select(range(num_samples))
 
         if preprocess_function is not None:
             calibration_dataset = calibration_dataset.map(preprocess_function, batched=preprocess_batch)
@@ -426,41 +544,88 @@ class OVQuantizer(OptimumQuantizer):
         batch_size: int,
         remove_unused_columns: bool,
         data_collator: Optional[DataCollator] = None,
+        num_workers: Optional[int] = None,
     ) -> OVDataLoader:
-        data_collator = data_collator if data_collator is not None else default_data_collator
         if remove_unused_columns:
             calibration_dataset = self._remove_unused_columns(calibration_dataset)
+        data_collator = data_collator if data_collator is not None else default_data_collator
+        if num_workers is None:
+            num_workers = min(4, (os.cpu_count() or 2) // 2)
+        if num_workers > 0:
+            # allow_none keeps the process-wide start method context untouched, a plain
+            # get_start_method() call would lock it and break a later set_start_method()
+            start_method = multiprocessing.get_start_method(allow_none=True)
+            if start_method is None:
+                # Not set yet, assume the platform default without initializing it
+                start_method = "fork" if os.name == "posix" and sys.platform != "darwin" else "spawn"
+            if start_method != "fork":
+                # Outside of fork the workers need to pickle the collator, which fails for
+                # lambdas, closures and objects defined in unimportable __main__ scripts:
+                # fall back to loading in the main process instead of crashing at iteration
+                try:
+                    pickle.dumps(data_collator)
+                except Exception:
+                    num_workers = 0
+        # Overlap preprocessing and collation with the calibration inference pass
+        dataloader_kwargs = (
+            {"num_workers": num_workers, "persistent_workers": True, "prefetch_factor": 2} if num_workers > 0 else {}
+        )
         self.input_names = calibration_dataset.column_names
         generator = torch.Generator()
         generator.manual_seed(self.seed)
         sampler = RandomSampler(calibration_dataset, generator=generator)
         calibration_dataloader = DataLoader(
-            calibration_dataset, batch_size=batch_size, sampler=sampler, collate_fn=data_collator, drop_last=False
+            calibration_dataset,
+            batch_size=batch_size,
+            sampler=sampler,
+            collate_fn=data_collator,
+            drop_last=False,
+            pin_memory=torch.cuda.is_available(),
+            **dataloader_kwargs,
         )
         return OVDataLoader(calibration_dataloader)
 
     def _remove_unused_columns(self, dataset: Dataset):
-        ignored_columns = list(set(dataset.column_names) - set(self._signature_columns))
-        return dataset.remove_columns(ignored_columns)
-
-
-def _onnx_export_nncf_model(model: NNCFNetwork, config: OnnxConfig, output: Union[str, io.BytesIO], opset: int = None):
-    signature = inspect.signature(model.forward)
-    signature = list(signature.parameters.keys())
+        ignored_columns = [column for column in dataset.column_names if column not in self._signature_columns_set]
+        # Rewriting the arrow table is only needed when there is actually something to drop
+        return dataset.remove_columns(ignored_columns) if ignored_columns else dataset
+
+
+def _move_inputs_to_device(value: Any, device: torch.device, non_blocking: bool = False):
+    # Walk tuple / list / dict containers directly, which is cheaper than the generic
+    # pytree machinery for the deep past_key_values structures of decoder models
+    if isinstance(value, torch.Tensor):
+        value = value.to(device, non_blocking=non_blocking)
+        # 4D inputs are NCHW activations: trace them channels_last contiguous to match the
+        # layout the OpenVINO CPU/NPU plugins prefer and avoid inserted Reorder layers
+        memory_format = torch.channels_last if value.dim() == 4 else torch.contiguous_format
+        return value.contiguous(memory_format=memory_format)
+    if isinstance(value, (tuple, list)):
+        return type(value)(_move_inputs_to_device(v, device, non_blocking) for v in value)
+    if isinstance(value, dict):
+        return {k: _move_inputs_to_device(v, device, non_blocking) for k, v in value.items()}
+    return value
+
+
+def _onnx_export_nncf_model(
+    model: NNCFNetwork,
+    config: OnnxConfig,
+    output: Union[str, io.BytesIO],
+    opset: int = None,
+    do_constant_folding: bool = True,
+):
+    signature = _get_forward_param_names(model)
     opset = opset or config.DEFAULT_ONNX_OPSET
     model_inputs = config.generate_dummy_inputs(framework="pt")
     # Create ordered inputs for the ONNX export of NNCFNetwork as keyword arguments are currently not supported
     model_inputs = tuple(model_inputs.pop(key, None) for key in signature if len(model_inputs) != 0)
     device = model.device
 
-    def remap(value):
-        if isinstance(value, torch.Tensor):
-            value = value.to(device)
-        return value
-
     with config.patch_model_for_export(model):
-        model_inputs = tree_map(remap, model_inputs)
-        with torch.no_grad():
+        model_inputs = _move_inputs_to_device(model_inputs, device, non_blocking=device.type == "cuda")
+        # inference_mode skips the autograd view tracking and version counter bumps that
+        # no_grad still pays for on every traced op
+        with torch.inference_mode():
             model.eval()
             # Disable node additions to be exported in the graph
             model.disable_dynamic_graph_building()
@@ -468,10 +633,15 @@ def _onnx_export_nncf_model(model: NNCFNetwork, config: OnnxConfig, output: Unio
                 model,
                 model_inputs,
                 f=output,
+                # Embed the weights as initializers so the FakeQuantize patterns fold into
+                # QDQ nodes OpenVINO dispatches to int8 kernels directly
+                export_params=True,
+                keep_initializers_as_inputs=False,
+                training=torch.onnx.TrainingMode.EVAL,
                 input_names=list(config.inputs.keys()),
                 output_names=list(config.outputs.keys()),
                 dynamic_axes=dict(chain(config.inputs.items(), config.outputs.items())),
-                do_constant_folding=True,
+                do_constant_folding=do_constant_folding,
                 opset_version=opset,
             )
             model.enable_dynamic_graph_building()
@@ -33,6 +33,8 @@ MIN_ONNX_QDQ_OPSET = 13
 
 EXTERNAL_DATA_FORMAT_SIZE_LIMIT = 2 * 1024 * 1024 * 1024
 
+IN_MEMORY_ONNX_SIZE_LIMIT = 500 * 1024 * 1024
+
 
 OV_TO_NP_TYPE = {
     "boolean": np.bool_,
@@ -73,3 +75,15 @@ def use_external_data_format(num_parameters: int) -> bool:
     """
 
     return compute_serialized_parameters_size(num_parameters, ParameterFormat.Float) >= EXTERNAL_DATA_FORMAT_SIZE_LIMIT
+
+
+def use_file_backed_export(num_parameters: int) -> bool:
+    """
+    Returns whether or not the ONNX export should be streamed to disk rather than buffered in memory
+    Args:
+        num_parameters: Number of parameter on the model
+    Returns:
+        True if model.num_parameters() * size_of(float32) >= 500Mb False otherwise
+    """
+
+    return compute_serialized_parameters_size(num_parameters, ParameterFormat.Float) >= IN_MEMORY_ONNX_SIZE_LIMIT